@@ -0,0 +1,60 @@
+import sys
+import json
+import logging
+import argparse
+from dependency_config import PATH_CHECKSUM_INDEX
+
+# Flat index of checksums.yml => one key per checksum, placeholder/[os/][arch/]version
+# Lookups are a single dict access, no YAML parsing
+
+
+def build_checksum_index(checksum_data):
+    index = {}
+    def flatten(key, value):
+        if isinstance(value, dict):
+            for child_key, child_value in value.items():
+                flatten(f'{key}/{child_key}', child_value)
+        else:
+            index[key] = value
+    for placeholder, value in checksum_data.items():
+        flatten(placeholder, value)
+    return index
+
+def save_checksum_index(file_path, checksum_data):
+    try:
+        with open(file_path, 'w') as f:
+            json.dump(build_checksum_index(checksum_data), f, indent=2, sort_keys=True)
+            f.write('\n')
+        return True
+    except Exception as e:
+        logging.error(f'Failed to save {file_path}: {e}')
+        return False
+
+def load_checksum_index(file_path=PATH_CHECKSUM_INDEX):
+    with open(file_path, 'r') as f:
+        return json.load(f)
+
+def get_checksum_key(placeholder, version, arch=None, os_name=None):
+    return '/'.join(str(part) for part in [placeholder, os_name, arch, version] if part is not None)
+
+def lookup_checksum(index, placeholder, version, arch=None, os_name=None):
+    return index.get(get_checksum_key(placeholder, version, arch, os_name))
+
+def main():
+    index = load_checksum_index(args.index)
+    checksum = lookup_checksum(index, args.placeholder, args.version, args.arch, args.os)
+    if checksum is None:
+        print(f'No checksum for {get_checksum_key(args.placeholder, args.version, args.arch, args.os)}', file=sys.stderr)
+        sys.exit(1)
+    print(checksum)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Checksum lookup in the compiled checksums index')
+    parser.add_argument('placeholder', help='Checksum placeholder, e.g. kubelet_checksums')
+    parser.add_argument('version', help='Component version as in checksums.yml, e.g. v1.30.4')
+    parser.add_argument('--arch', help='Architecture, e.g. amd64')
+    parser.add_argument('--os', help='Operating system for os/arch structured checksums, e.g. linux')
+    parser.add_argument('--index', default=PATH_CHECKSUM_INDEX, help=f'Path to the checksums index (default: {PATH_CHECKSUM_INDEX})')
+    args = parser.parse_args()
+
+    main()
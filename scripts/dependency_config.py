@@ -1,13 +1,35 @@
 ARCHITECTURES = ['arm', 'arm64', 'amd64', 'ppc64le']
 OSES = ['darwin', 'linux', 'windows']
 README_COMPONENTS = ['etcd', 'containerd', 'crio', 'calicoctl', 'krew', 'helm']
+KUBE_SERIES_COMPONENTS = ['kubeadm', 'kubectl', 'kubelet', 'crictl', 'crio'] # versioned along kubernetes minors, see --series
 SHA256REGEX = r'(\b[a-f0-9]{64})\b'
 
 PATH_DOWNLOAD = 'roles/kubespray-defaults/defaults/main/download.yml'
 PATH_CHECKSUM = 'roles/kubespray-defaults/defaults/main/checksums.yml'
+PATH_CHECKSUM_INDEX = 'roles/kubespray-defaults/files/checksums_index.json' # outside defaults/main, ansible would load it as variables
 PATH_MAIN = 'roles/kubespray-defaults/defaults/main/main.yml'
 PATH_README = 'README.md'
 PATH_VERSION_DIFF = 'version_diff.json'
+PATH_COMPONENT_STATS = 'cache/component_stats.json' # lives with the download cache, CI starts without it and always uses the static estimate
+
+# Static cost estimate (seconds per file) used when a component has no recorded run
+ESTIMATED_BINARY_SECONDS = 5.0
+ESTIMATED_MANIFEST_SECONDS = 0.5
+ESTIMATED_BYTES_PER_SECOND = 10 * 1024 * 1024
+
+# Adaptive per-host download concurrency
+INITIAL_HOST_CONCURRENCY = 2
+RATE_LIMIT_BACKOFF_SECONDS = 60 # when neither Retry-After nor X-RateLimit-Reset is sent
+RATE_LIMIT_RETRIES = 3
+
+# Entries written to the per-phase --profile reports
+PROFILE_TOP_ENTRIES = 50
+
+# Releases/tags fetched per component with --series, older minors are rarely in the latest entries
+GRAPHQL_MAX_ENTRIES = 100
+
+# Seconds between upstream polls with --watch
+WATCH_INTERVAL_SECONDS = 900
 
 COMPONENT_INFO = {
     'calico_crds': {
@@ -6,11 +6,22 @@ import requests
 import json
 import argparse
 import hashlib
+import threading
+import time
+import functools
+import cProfile
+import pstats
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
 from ruamel.yaml import YAML
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor
-from dependency_config import ARCHITECTURES, OSES, README_COMPONENTS, PATH_DOWNLOAD, PATH_CHECKSUM, PATH_MAIN, PATH_README, PATH_VERSION_DIFF, COMPONENT_INFO, SHA256REGEX
+from checksum_index import save_checksum_index
+from dependency_config import ARCHITECTURES, OSES, README_COMPONENTS, KUBE_SERIES_COMPONENTS, PATH_DOWNLOAD, PATH_CHECKSUM, PATH_CHECKSUM_INDEX, PATH_MAIN, PATH_README, PATH_VERSION_DIFF, PATH_COMPONENT_STATS, COMPONENT_INFO, SHA256REGEX, ESTIMATED_BINARY_SECONDS, ESTIMATED_MANIFEST_SECONDS, ESTIMATED_BYTES_PER_SECOND, INITIAL_HOST_CONCURRENCY, RATE_LIMIT_BACKOFF_SECONDS, RATE_LIMIT_RETRIES, PROFILE_TOP_ENTRIES, GRAPHQL_MAX_ENTRIES, WATCH_INTERVAL_SECONDS
 
 
 yaml = YAML()
@@ -25,6 +36,12 @@ cache_dir = './cache'
 cache_expiry_seconds = 86400
 os.makedirs(cache_dir, exist_ok=True)
 
+component_stats_lock = threading.Lock()
+component_bytes = {}
+
+version_indexes_lock = threading.Lock()
+version_indexes = {}
+
 
 github_api_url = 'https://api.github.com/graphql'
 gh_token = os.getenv('GH_TOKEN')
@@ -45,12 +62,229 @@ def get_session_with_retries():
     adapter = HTTPAdapter(
         pool_connections=50,
         pool_maxsize=50,
-        max_retries=Retry(total=3, backoff_factor=1)
+        max_retries=Retry(total=3, backoff_factor=1, respect_retry_after_header=False) # rate limits are handled by HostConcurrencyController
     )
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
 
+class HostConcurrencyController:
+    # Limits in-flight downloads per host: additive increase while latency/throughput hold,
+    # halve and pause the host on 429/403 rate limit and 503 Retry-After responses
+    def __init__(self, max_limit, initial_limit=INITIAL_HOST_CONCURRENCY):
+        self.max_limit = max(1, max_limit)
+        self.initial_limit = min(initial_limit, self.max_limit)
+        self.condition = threading.Condition()
+        self.hosts = {}
+
+    def _host(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = {
+                'limit': float(self.initial_limit),
+                'in_flight': 0,
+                'blocked_until': 0.0,
+                'min_latency': None,
+                'max_throughput': 0.0,
+            }
+        return self.hosts[host]
+
+    @contextmanager
+    def slot(self, host):
+        with self.condition:
+            state = self._host(host)
+            while True:
+                wait = state['blocked_until'] - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                elif state['in_flight'] >= int(state['limit']):
+                    self.condition.wait()
+                else:
+                    break
+            state['in_flight'] += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                state['in_flight'] -= 1
+                self.condition.notify_all()
+
+    def record_response(self, host, response, elapsed):
+        # Returns True if the response was rate limited and the request should be retried
+        with self.condition:
+            state = self._host(host)
+            delay = get_rate_limit_delay(response)
+            if delay is not None:
+                now = time.monotonic()
+                if now >= state['blocked_until']: # halve once per back-off window, not for every in-flight reply
+                    state['limit'] = max(1.0, state['limit'] / 2)
+                state['blocked_until'] = max(state['blocked_until'], now + delay)
+                logging.warning(f'Rate limited by {host}, pausing {delay:.0f}s, concurrency limit {int(state["limit"])}')
+                self.condition.notify_all()
+                return True
+            if not response.ok:
+                return False
+            throughput = len(response.content) / max(elapsed, 0.001)
+            state['min_latency'] = elapsed if state['min_latency'] is None else min(state['min_latency'], elapsed)
+            state['max_throughput'] = max(state['max_throughput'], throughput)
+            if elapsed <= 2 * state['min_latency'] or throughput >= state['max_throughput'] / 2:
+                state['limit'] = min(float(self.max_limit), state['limit'] + 1 / state['limit'])
+            else: # host is saturating
+                state['limit'] = max(1.0, state['limit'] - 1 / state['limit'])
+            logging.debug(f'Host {host} latency {elapsed:.2f}s, concurrency limit {state["limit"]:.2f}')
+            self.condition.notify_all()
+            return False
+
+def get_rate_limit_delay(response):
+    # Seconds to pause the host, None if the response is not rate limited
+    headers = response.headers
+    remaining = headers.get('X-RateLimit-Remaining')
+    rate_limited = (
+        response.status_code == 429
+        or (response.status_code == 403 and ('Retry-After' in headers or remaining == '0'))
+        or (response.status_code == 503 and 'Retry-After' in headers) # urllib3 no longer retries it, see get_session_with_retries
+    )
+    if not rate_limited:
+        return None
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    reset = headers.get('X-RateLimit-Reset')
+    if remaining == '0' and reset and reset.isdigit():
+        return max(0.0, int(reset) - time.time())
+    return RATE_LIMIT_BACKOFF_SECONDS
+
+class Tracer:
+    # Chrome trace-event recorder, each span is a complete ('X') event on its thread
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.events = []
+        self.thread_names = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, **span_args):
+        # Yields the span args so callers can add details (bytes, cache hit, ...) while running
+        if not self.enabled:
+            yield span_args
+            return
+        start = time.perf_counter()
+        try:
+            yield span_args
+        finally:
+            end = time.perf_counter()
+            thread = threading.current_thread()
+            event = {
+                'name': name,
+                'cat': 'updater',
+                'ph': 'X',
+                'ts': round((start - self.start) * 1e6, 1),
+                'dur': round((end - start) * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': thread.ident,
+                'args': span_args,
+            }
+            with self.lock:
+                self.events.append(event)
+                self.thread_names[thread.ident] = thread.name
+
+    def reset(self):
+        with self.lock:
+            self.events = []
+            self.thread_names = {}
+            self.start = time.perf_counter()
+
+    def save(self, file_path, data=None):
+        with self.lock:
+            thread_names = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                for tid, name in self.thread_names.items()
+            ]
+            trace = {'traceEvents': thread_names + self.events, 'displayTimeUnit': 'ms'}
+        return save_json_file(file_path, trace)
+
+tracer = Tracer()
+
+class PhaseProfiler:
+    # cProfile pstats or tracemalloc top allocations per pipeline phase, file names are stable to diff runs
+    def __init__(self, mode=None, output_dir='profile'):
+        self.mode = mode
+        self.output_dir = output_dir
+        if self.mode:
+            os.makedirs(self.output_dir, exist_ok=True)
+        if self.mode == 'mem':
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        if self.mode == 'cpu':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._save_cpu(name, profiler)
+        elif self.mode == 'mem':
+            tracemalloc.reset_peak()
+            before = self._snapshot()
+            try:
+                yield
+            finally:
+                self._save_mem(name, before, self._snapshot())
+        else:
+            yield
+
+    @contextmanager
+    def component_phase(self, name):
+        # cProfile before Python 3.12 only sees the thread that enabled it => profile components in their worker thread,
+        # from 3.12 on it is interpreter-wide and the components phase already covers the workers
+        if self.mode == 'cpu' and sys.version_info < (3, 12):
+            with self.phase(name):
+                yield
+        else:
+            yield
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ])
+
+    def _save_cpu(self, name, profiler):
+        try:
+            profiler.dump_stats(os.path.join(self.output_dir, f'{name}.pstats'))
+            with open(os.path.join(self.output_dir, f'{name}.txt'), 'w') as f:
+                stats = pstats.Stats(profiler, stream=f)
+                stats.sort_stats('cumulative').print_stats(PROFILE_TOP_ENTRIES)
+        except Exception as e:
+            logging.warning(f'Failed to save CPU profile of phase {name}: {e}')
+
+    def _save_mem(self, name, before, after):
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            with open(os.path.join(self.output_dir, f'{name}-mem.txt'), 'w') as f:
+                f.write(f'Phase {name}: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n')
+                f.write(f'Top {PROFILE_TOP_ENTRIES} allocations by size difference:\n')
+                for stat in after.compare_to(before, 'lineno')[:PROFILE_TOP_ENTRIES]:
+                    f.write(f'{stat}\n')
+        except Exception as e:
+            logging.warning(f'Failed to save memory profile of phase {name}: {e}')
+
+profiler = PhaseProfiler()
+
+def get_retry_count(response):
+    retries = getattr(response.raw, 'retries', None) # urllib3 Retry of the adapter
+    return len(getattr(retries, 'history', ()))
+
 def get_current_version(component, component_data):
     kube_major_version = component_data['kube_major_version']
     placeholder_version = [kube_major_version if item == 'kube_major_version' else item for item in component_data['placeholder_version']]
@@ -62,44 +296,82 @@ def get_current_version(component, component_data):
         current_version = current_version.get(key)
     return current_version
 
-def get_latest_version(component_repo_metadata):
-    releases = component_repo_metadata.get('releases', {}).get('nodes', [])
-    for release in releases:
-        if release.get('isLatest', False):
-            return release['tagName']
-    tags = component_repo_metadata.get('refs', {}).get('nodes', []) # fallback on tags
-    if tags:
-        first_tag = tags[0]['name']
-        return first_tag
-    return None
+ParsedVersion = namedtuple('ParsedVersion', ['name', 'key', 'series', 'stable', 'date'])
+VERSION_REGEX = re.compile(r'^v?(\d+)\.(\d+)(?:\.(\d+))?(.*)$')
+DATE_VERSION_REGEX = re.compile(r'release-(\d{8})') # gvisor
 
-def get_patch_versions(component, latest_version, component_repo_metadata):
-    if component in ['gvisor_runsc','gvisor_containerd_shim']: # hack for gvisor
-        return [latest_version]
-    match = re.match(r'v?(\d+)\.(\d+)', latest_version)
+@functools.lru_cache(maxsize=None)
+def parse_version(version):
+    match = DATE_VERSION_REGEX.search(version)
+    if match:
+        return ParsedVersion(version, (int(match.group(1)),), None, True, match.group(1))
+    match = VERSION_REGEX.match(version)
     if not match:
+        return ParsedVersion(version, (), None, False, None)
+    major, minor, patch, suffix = match.groups()
+    key = (int(major), int(minor), int(patch) if patch is not None else -1) # v1.2 sorts before v1.2.0
+    return ParsedVersion(version, key, (int(major), int(minor)), not suffix, None) # no rc, alpha, dev, etc.
+
+class VersionIndex:
+    # Parsed releases and tags of one repository, stable versions bucketed per minor series
+    def __init__(self, component_repo_metadata):
+        releases = component_repo_metadata.get('releases', {}).get('nodes', [])
+        tags = component_repo_metadata.get('refs', {}).get('nodes', [])
+        self.latest_release = next((release['tagName'] for release in releases if release.get('isLatest', False)), None)
+        self.first_tag = tags[0]['name'] if tags else None # fallback on tags
+        self.release_series = self._bucket((release.get('tagName', ''), release.get('isPrerelease', False)) for release in releases)
+        self.tag_series = self._bucket((tag.get('name', ''), False) for tag in tags)
+
+    @staticmethod
+    def _bucket(versions):
+        # versions => (name, prerelease flag), a release flagged as prerelease is skipped even with a stable looking tag
+        series = {}
+        for version, prerelease in versions:
+            parsed = parse_version(version)
+            if parsed.stable and parsed.series and not prerelease:
+                series.setdefault(parsed.series, []).append(parsed)
+        for parsed_versions in series.values():
+            parsed_versions.sort(key=lambda parsed: parsed.key) # sort for checksum update
+        return series
+
+    def latest(self):
+        return self.latest_release or self.first_tag
+
+    def series_versions(self, series):
+        parsed_versions = self.release_series.get(series) or self.tag_series.get(series, []) # fallback on tags
+        return [parsed.name for parsed in parsed_versions]
+
+    def latest_in_series(self, series):
+        versions = self.series_versions(series)
+        return versions[-1] if versions else None
+
+def invalidate_version_indexes(component_info):
+    with version_indexes_lock:
+        for data in component_info.values():
+            version_indexes.pop((data['owner'], data['repo']), None)
+
+def get_version_index(component, repo_metadata):
+    # One index per repository, shared by components of the same repository
+    key = (COMPONENT_INFO[component]['owner'], COMPONENT_INFO[component]['repo'])
+    with version_indexes_lock:
+        if key not in version_indexes:
+            version_indexes[key] = VersionIndex(repo_metadata.get(component, {}))
+        return version_indexes[key]
+
+def get_latest_version(version_index):
+    return version_index.latest()
+
+def get_patch_versions(component, latest_version, version_index):
+    parsed = parse_version(latest_version)
+    if parsed.date: # gvisor release-YYYYMMDD, no minor series
+        return [latest_version]
+    if not parsed.series:
         logging.error(f'Invalid version format: {latest_version}')
         return []
-    major_version, minor_version = match.groups()
-    patch_versions = []
-    stable_version_pattern = re.compile(rf'^v?{major_version}\.{minor_version}(\.\d+)?$') # no rc, alpha, dev, etc.
-    # Search releases
-    releases = component_repo_metadata.get('releases', {}).get('nodes', [])
-    for release in releases:
-        version = release.get('tagName', '')
-        if stable_version_pattern.match(version):
-            patch_versions.append(version)
-    # Fallback to tags
-    if not patch_versions:
-        tags = component_repo_metadata.get('refs', {}).get('nodes', [])
-        for tag in tags:
-            version = tag.get('name', '')
-            if stable_version_pattern.match(version):
-                patch_versions.append(version)
-    patch_versions.sort(key=lambda v: list(map(int, re.findall(r'\d+', v)))) # sort for checksum update
-    return patch_versions
+    return version_index.series_versions(parsed.series)
 
 def get_repository_metadata(component_info, session):
+    # Lean query => release and tag names with flags, commits are fetched later for used tags only
     query_parts = []
     for component, data in component_info.items():
         owner = data['owner']
@@ -109,40 +381,114 @@ def get_repository_metadata(component_info, session):
                 releases(first: {args.graphql_number_of_entries}, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
                     nodes {{
                         tagName
-                        url
-                        description
-                        publishedAt
                         isLatest
+                        isPrerelease
                     }}
                 }}
                 refs(refPrefix: "refs/tags/", first: {args.graphql_number_of_entries}, orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}) {{
                     nodes {{
                         name
-                        target {{
-                            ... on Tag {{
-                                target {{
-                                    ... on Commit {{
-                                        history(first: {args.graphql_number_of_commits}) {{
-                                            edges {{
-                                                node {{
-                                                    oid
-                                                    message
-                                                    url
-                                                }}
+                    }}
+                }}
+            }}
+        """)
+    query = f"query {{ {''.join(query_parts)} }}"
+    with tracer.span('get_repository_metadata', components=len(component_info)) as span:
+        return run_graphql_query(query, session, 'repository metadata', span)
+
+def get_upstream_state(repositories, session):
+    # Cheap query => release and tag counts plus the latest release tag per repository, no nodes
+    query_parts = []
+    for i, (owner, repo) in enumerate(repositories):
+        query_parts.append(f"""
+            repository_{i}: repository(owner: "{owner}", name: "{repo}") {{
+                releases {{
+                    totalCount
+                }}
+                refs(refPrefix: "refs/tags/") {{
+                    totalCount
+                }}
+                latestRelease {{
+                    tagName
+                }}
+            }}
+        """)
+    query = f"query {{ {''.join(query_parts)} }}"
+    with tracer.span('get_upstream_state', repositories=len(repositories)) as span:
+        data = run_graphql_query(query, session, 'upstream state', span)
+    if data is None:
+        return None
+    upstream_state = {}
+    for i, repository in enumerate(repositories):
+        repository_data = data.get(f'repository_{i}')
+        if not repository_data: # not resolved in this poll, keep the previous state
+            continue
+        upstream_state[repository] = (
+            (repository_data.get('releases') or {}).get('totalCount'),
+            (repository_data.get('refs') or {}).get('totalCount'),
+            (repository_data.get('latestRelease') or {}).get('tagName'),
+        )
+    return upstream_state
+
+def detect_upstream_changes(component_info, upstream_state, session):
+    # Returns the components whose repository moved and the new state, None if upstream could not be polled
+    repositories = {}
+    for component, data in component_info.items():
+        repositories.setdefault((data['owner'], data['repo']), []).append(component)
+    polled_state = get_upstream_state(list(repositories), session)
+    if polled_state is None:
+        return None, upstream_state
+    new_state = dict(upstream_state)
+    changed_components = []
+    for repository, components in repositories.items():
+        previous = upstream_state.get(repository)
+        current = polled_state.get(repository, previous)
+        new_state[repository] = current
+        if current != previous:
+            logging.debug(f'{"/".join(repository)} changed (releases, tags, latest release): {previous} -> {current}')
+            changed_components.extend(components)
+    return [component for component in component_info if component in changed_components], new_state
+
+def get_version_details(version_diff, session):
+    # Targeted query => release description and commit history of the latest tag,
+    # once per repository and version (kubernetes, calico and gvisor are shared by several components)
+    versions = {}
+    for component, data in version_diff.items():
+        versions.setdefault((data['owner'], data['repo'], data['latest_version']), []).append(component)
+    query_parts = []
+    for i, (owner, repo, version) in enumerate(versions):
+        query_parts.append(f"""
+            version_{i}: repository(owner: "{owner}", name: "{repo}") {{
+                release(tagName: "{version}") {{
+                    tagName
+                    description
+                }}
+                ref(qualifiedName: "refs/tags/{version}") {{
+                    name
+                    target {{
+                        ... on Tag {{
+                            target {{
+                                ... on Commit {{
+                                    history(first: {args.graphql_number_of_commits}) {{
+                                        edges {{
+                                            node {{
+                                                oid
+                                                message
+                                                url
                                             }}
                                         }}
                                     }}
                                 }}
                             }}
-                            ... on Commit {{
-                                # In case the tag directly points to a commit
-                                history(first: {args.graphql_number_of_commits}) {{
-                                    edges {{
-                                        node {{
-                                            oid
-                                            message
-                                            url
-                                        }}
+                        }}
+                        ... on Commit {{
+                            # In case the tag directly points to a commit
+                            history(first: {args.graphql_number_of_commits}) {{
+                                edges {{
+                                    node {{
+                                        oid
+                                        message
+                                        url
                                     }}
                                 }}
                             }}
@@ -151,8 +497,38 @@ def get_repository_metadata(component_info, session):
                 }}
             }}
         """)
-
+    if not query_parts:
+        return {}
     query = f"query {{ {''.join(query_parts)} }}"
+    with tracer.span('get_version_details', components=len(version_diff), versions=len(versions)) as span:
+        data = run_graphql_query(query, session, 'version details', span)
+    if data is None:
+        return None
+    version_details = {}
+    for i, components in enumerate(versions.values()):
+        for component in components:
+            version_details[component] = data.get(f'version_{i}')
+    return version_details
+
+def extract_version_details(version_details):
+    # Keep only what the PR body needs => release description and commits of the latest tag
+    release = (version_details or {}).get('release') or {}
+    target = ((version_details or {}).get('ref') or {}).get('target') or {}
+    history = target.get('history') or (target.get('target') or {}).get('history') or {} # Tag -> Commit or Commit
+    commits = []
+    for edge in history.get('edges', []):
+        node = edge.get('node', {})
+        commits.append({
+            'oid': node.get('oid'),
+            'message': node.get('message'),
+            'url': node.get('url'),
+        })
+    return {
+        'description': release.get('description'),
+        'commits': commits,
+    }
+
+def run_graphql_query(query, session, description, span=None):
     headers = {
         'Authorization': f'Bearer {gh_token}',
         'Content-Type': 'application/json'
@@ -160,6 +536,8 @@ def get_repository_metadata(component_info, session):
 
     try:
         response = session.post(github_api_url, json={'query': query}, headers=headers)
+        if span is not None:
+            span.update(host=urlparse(github_api_url).hostname, bytes=len(response.content), status=response.status_code, retries=get_retry_count(response))
         response.raise_for_status()
         json_data = response.json()
         data = json_data.get('data')
@@ -170,47 +548,114 @@ def get_repository_metadata(component_info, session):
             logging.error(f'GraphQL query returned errors: {json_data}')
             return None
     except Exception as e:
-        logging.error(f'Error fetching repository metadata: {e}')
+        logging.error(f'Error fetching {description}: {e}')
         return None
 
 def calculate_checksum(cachefile, sha_regex):
-    if sha_regex:
-        logging.debug(f'Searching with regex {sha_regex} in file {cachefile}')
-        with open(f'cache/{cachefile}', 'r') as f:
-            for line in f:
-                if sha_regex == 'simple': # Only sha is present in the file
-                    pattern = re.compile(SHA256REGEX)
-                else:
-                    pattern = re.compile(rf'(?:{SHA256REGEX}.*{sha_regex}|{sha_regex}.*{SHA256REGEX})') # Sha may be at start or end
-                match = pattern.search(line)
-                if match:
-                    checksum = match.group(1) or match.group(2)
-                    logging.debug(f'Matched line: {line.strip()}')
-                    return checksum
-    else: # binary
-        sha256_hash = hashlib.sha256()
-        with open(f'cache/{cachefile}', 'rb') as f:
-            for byte_block in iter(lambda: f.read(4096), b''):
-                sha256_hash.update(byte_block)
-        checksum = sha256_hash.hexdigest()
-        return checksum
-    
-def download_file_and_get_checksum(component, arch, url_download, version, sha_regex, session):
+    with tracer.span('calculate_checksum', file=cachefile, sha_regex=sha_regex or 'binary', bytes=os.path.getsize(f'cache/{cachefile}')):
+        if sha_regex:
+            logging.debug(f'Searching with regex {sha_regex} in file {cachefile}')
+            with open(f'cache/{cachefile}', 'r') as f:
+                for line in f:
+                    if sha_regex == 'simple': # Only sha is present in the file
+                        pattern = re.compile(SHA256REGEX)
+                    else:
+                        pattern = re.compile(rf'(?:{SHA256REGEX}.*{sha_regex}|{sha_regex}.*{SHA256REGEX})') # Sha may be at start or end
+                    match = pattern.search(line)
+                    if match:
+                        checksum = match.group(1) or match.group(2)
+                        logging.debug(f'Matched line: {line.strip()}')
+                        return checksum
+        else: # binary
+            sha256_hash = hashlib.sha256()
+            with open(f'cache/{cachefile}', 'rb') as f:
+                for byte_block in iter(lambda: f.read(4096), b''):
+                    sha256_hash.update(byte_block)
+            checksum = sha256_hash.hexdigest()
+            return checksum
+
+def download_file_and_get_checksum(component, arch, url_download, version, sha_regex, session, os_name=None):
     logging.info(f'Download URL {url_download}')
     cache_file = f'{component}-{arch}-{version}'
-    if os.path.exists(f'cache/{cache_file}'):
-        logging.info(f'Using cached file for {url_download}')
-        return calculate_checksum(cache_file, sha_regex)
+    host = urlparse(url_download).hostname
+    with tracer.span('download_file_and_get_checksum', component=component, version=version, os=os_name, arch=arch, host=host) as span:
+        if os.path.exists(f'cache/{cache_file}'):
+            logging.info(f'Using cached file for {url_download}')
+            span.update(cache_hit=True, bytes=os.path.getsize(f'cache/{cache_file}'))
+            record_component_bytes(component, cache_file)
+            return calculate_checksum(cache_file, sha_regex)
+        span.update(cache_hit=False, retries=0)
+        try:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                with concurrency_controller.slot(host):
+                    start = time.monotonic()
+                    response = session.get(url_download, timeout=10)
+                    elapsed = time.monotonic() - start
+                span.update(retries=attempt + get_retry_count(response), status=response.status_code)
+                if not concurrency_controller.record_response(host, response, elapsed):
+                    break
+            response.raise_for_status()
+            with open(f'cache/{cache_file}', 'wb') as f:
+                f.write(response.content)
+            logging.info(f'Downloaded and cached file for {url_download}')
+            span.update(bytes=len(response.content))
+            record_component_bytes(component, cache_file)
+            return calculate_checksum(cache_file, sha_regex)
+        except Exception as e:
+            logging.warning(e)
+            return None
+
+def record_component_bytes(component, cache_file):
+    size = os.path.getsize(f'cache/{cache_file}')
+    with component_stats_lock:
+        component_bytes[component] = component_bytes.get(component, 0) + size
+
+def load_component_stats(file_path):
     try:
-        response = session.get(url_download, timeout=10)
-        response.raise_for_status()
-        with open(f'cache/{cache_file}', 'wb') as f:
-            f.write(response.content)
-        logging.info(f'Downloaded and cached file for {url_download}')
-        return calculate_checksum(cache_file, sha_regex)
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
     except Exception as e:
-        logging.warning(e)
-        return None
+        logging.warning(f'Failed to load {file_path}, using static estimates: {e}')
+        return {}
+
+def estimate_component_cost(component, component_data, repo_metadata):
+    # Previous run => recorded duration, bytes cover runs that were served from cache
+    stats = component_stats.get(component)
+    if stats:
+        return max(stats.get('duration', 0), stats.get('bytes', 0) / ESTIMATED_BYTES_PER_SECOND)
+    # Static estimate => number of patch versions x files per version x cost per file
+    version_index = get_version_index(component, repo_metadata)
+    latest_version = get_latest_version(version_index)
+    patch_versions = get_patch_versions(component, latest_version, version_index) if latest_version else []
+    files_per_version = {
+        'os_arch': len(OSES) * len(ARCHITECTURES),
+        'arch': len(ARCHITECTURES),
+        'simple': 1,
+    }.get(component_data['checksum_structure'], 1)
+    seconds_per_file = ESTIMATED_MANIFEST_SECONDS if component_data['sha_regex'] else ESTIMATED_BINARY_SECONDS
+    return max(len(patch_versions), 1) * files_per_version * seconds_per_file
+
+def schedule_components(component_info, repo_metadata):
+    costs = {component: estimate_component_cost(component, component_data, repo_metadata) for component, component_data in component_info.items()}
+    scheduled = sorted(component_info, key=lambda component: costs[component], reverse=True) # longest expected first
+    logging.info(f'Component schedule: {[(component, round(costs[component], 1)) for component in scheduled]}')
+    return scheduled
+
+def run_component(component, component_data, repo_metadata, session, series=None):
+    start = time.monotonic()
+    with profiler.component_phase(f'component-{component}' if not series else f'component-{component}-{series}'):
+        component_update = process_component(component, component_data, repo_metadata, session, series)
+    if args.ci_check or series or component_update is None: # no downloads, not the default series or stopped early, keep stats of the last full run
+        return component_update
+    duration = time.monotonic() - start
+    with component_stats_lock:
+        component_stats[component] = {
+            'duration': round(duration, 3),
+            'bytes': component_bytes.get(component, 0),
+        }
+    return component_update
 
 def get_checksums(component, component_data, versions, session):
     checksums = {}
@@ -226,7 +671,7 @@ def get_checksums(component, component_data, versions, session):
                 for arch in ARCHITECTURES:
                     url_download = url_download_template.format(arch=arch, os_name=os_name, version=processed_version)
                     sha_regex = component_data.get('sha_regex').format(arch=arch, os_name=os_name)
-                    checksum = download_file_and_get_checksum(component, arch, url_download, processed_version, sha_regex, session) or 0
+                    checksum = download_file_and_get_checksum(component, arch, url_download, processed_version, sha_regex, session, os_name) or 0
                     checksums[version][os_name][arch] = checksum
         elif component_data['checksum_structure'] == 'arch':
             # Arch -> Checksum
@@ -248,6 +693,22 @@ def get_checksums(component, component_data, versions, session):
             checksums[version] = checksum  # Store checksum for the version
     return checksums
 
+def get_version_sort_key(version):
+    parsed = parse_version(str(version))
+    if parsed.key:
+        return parsed.key
+    return tuple(map(int, re.findall(r'\d+', str(version)))) # e.g. gvisor dates stored without release- prefix
+
+def insert_version(version_map, version, checksum):
+    # Newest first => insert before the first older version, existing entries keep their value and order
+    if version in version_map:
+        return version_map
+    items = list(version_map.items())
+    key = get_version_sort_key(version)
+    position = next((i for i, (existing_version, _) in enumerate(items) if get_version_sort_key(existing_version) < key), len(items))
+    items.insert(position, (version, checksum))
+    return dict(items)
+
 def update_checksum(component, component_data, checksums, version):
     processed_version = process_version_string(component, version)
     placeholder_checksum = component_data['placeholder_checksum']
@@ -256,17 +717,17 @@ def update_checksum(component, component_data, checksums, version):
 
     if checksum_structure == 'simple':
         # Simple structure (placeholder_checksum -> version -> checksum)
-        checksum_yaml_data[placeholder_checksum] = {processed_version: checksums, **current}
+        checksum_yaml_data[placeholder_checksum] = insert_version(current, processed_version, checksums)
     elif checksum_structure == 'os_arch':
         # OS structure (placeholder_checksum -> os -> arch -> version -> checksum)
         for os_name, arch_dict in checksums.items():
             os_current = current.setdefault(os_name, {})
             for arch, checksum in arch_dict.items():
-                os_current[arch] = {(processed_version): checksum, **os_current.get(arch, {})}
+                os_current[arch] = insert_version(os_current.get(arch, {}), processed_version, checksum)
     elif checksum_structure == 'arch':
         # Arch structure (placeholder_checksum -> arch -> version -> checksum)
         for arch, checksum in checksums.items():
-            current[arch] = {(processed_version): checksum, **current.get(arch, {})}
+            current[arch] = insert_version(current.get(arch, {}), processed_version, checksum)
     logging.info(f'Updated {placeholder_checksum} with version {processed_version} and checksums {checksums}')
 
 def resolve_kube_dependent_component_version(component, component_data, version):
@@ -378,35 +839,39 @@ def process_version_string(component, version):
         if version.startswith('v'):
             version = version[1:]
             return version
-    match = re.search(r'release-(\d{8})', version) # gvisor
-    if match:
-        version = match.group(1)
+    parsed = parse_version(version)
+    if parsed.date: # gvisor
+        version = parsed.date
     return version
 
 def get_major_version(version):
-    match = re.match(r'^(v\d+)\.(\d+)', version)
-    if match:
-        return f'{match.group(1)}.{match.group(2)}'
+    parsed = parse_version(version)
+    if parsed.series and version.startswith('v'):
+        return f'v{parsed.series[0]}.{parsed.series[1]}'
     return None
 
-def process_component(component, component_data, repo_metadata, session):
-    logging.info(f'Processing component: {component}')
-    component_repo_metada = repo_metadata.get(component, {})
+def process_component(component, component_data, repo_metadata, session, series=None):
+    logging.info(f'Processing component: {component}' + (f' for series {series}' if series else ''))
+    version_index = get_version_index(component, repo_metadata)
+    component_data = dict(component_data) # a component may run for several series concurrently
 
-    # Get current kube version
+    # Get current kube version, or the requested series
     kube_version = main_yaml_data.get('kube_version')
-    kube_major_version = get_major_version(kube_version)
+    kube_major_version = series or get_major_version(kube_version)
     component_data['kube_version'] = kube_version  # needed for nested components
     component_data['kube_major_version'] = kube_major_version  # needed for nested components
 
-    # Get current component version
+    # Get current component version, a requested series may not be configured yet
     current_version = get_current_version(component, component_data)
-    if not current_version:
+    if not current_version and not series:
         logging.info(f'Stop processing component {component}, current version unknown')
         return
 
-    # Get latest component version
-    latest_version = get_latest_version(component_repo_metada)
+    # Get latest component version, latest stable patch of the requested series
+    if series:
+        latest_version = version_index.latest_in_series(parse_version(series).series)
+    else:
+        latest_version = get_latest_version(version_index)
     if not latest_version:
         logging.info(f'Stop processing component {component}, latest version unknown.')
         return
@@ -429,19 +894,36 @@ def process_component(component, component_data, repo_metadata, session):
             'processed_latest_version': processed_latest_version, # used for PR body
             'owner' : component_data['owner'],
             'repo' : component_data['repo'],
-            'repo_metadata' : component_repo_metada,
+            # 'description' and 'commits' are added once all components are processed
         }
         return
 
     # Get patch versions
-    patch_versions = get_patch_versions(component, latest_version, component_repo_metada)
+    patch_versions = get_patch_versions(component, latest_version, version_index)
     logging.info(f'Component {component} patch versions: {patch_versions}')
 
     # Get checksums for all patch versions
     checksums = get_checksums(component, component_data, patch_versions, session)
+    # Configuration files are updated once all components are processed
+    return {
+        'component': component,
+        'component_data': component_data,
+        'latest_version': latest_version,
+        'processed_latest_version': processed_latest_version,
+        'patch_versions': patch_versions,
+        'checksums': checksums,
+    }
+
+def merge_component_update(component_update):
+    component = component_update['component']
+    component_data = component_update['component_data']
+    latest_version = component_update['latest_version']
+    processed_latest_version = component_update['processed_latest_version']
+    kube_major_version = get_major_version(component_data['kube_version']) # README follows the configured kube_version only
+
     # Update checksums
-    for version in patch_versions:
-        version_checksum = checksums.get(version)
+    for version in component_update['patch_versions']:
+        version_checksum = component_update['checksums'].get(version)
         update_checksum(component, component_data, version_checksum, version)
 
     # Update version in configuration
@@ -459,21 +941,43 @@ def process_component(component, component_data, repo_metadata, session):
         component = component.replace('crio', 'cri-o').replace('calicoctl', 'calico')
         update_readme(component, latest_version)
 
+def parse_series(value):
+    series_list = []
+    for series in value.split(','):
+        series = series.strip()
+        if not series: # trailing or doubled comma
+            continue
+        parsed = parse_version(series)
+        if not parsed.series:
+            raise argparse.ArgumentTypeError(f'Invalid kubernetes minor: {series}')
+        series_list.append(f'v{parsed.series[0]}.{parsed.series[1]}')
+    if not series_list:
+        raise argparse.ArgumentTypeError('No kubernetes minor given')
+    return sorted(set(series_list), key=lambda series: parse_version(series).key)
+
 def main():
+    global main_yaml_data, checksum_yaml_data, download_yaml_data, readme_data, version_diff, component_stats, concurrency_controller, tracer, profiler
     # Setup logging
     setup_logging(args.loglevel)
     # Setup session with retries
     session = get_session_with_retries()
+    # Adjust in-flight downloads per host, --max-workers is the upper bound
+    concurrency_controller = HostConcurrencyController(args.max_workers)
+    # Record spans of GraphQL queries, downloads and hashing
+    tracer = Tracer(enabled=bool(args.trace_out))
+    # Profile each pipeline phase
+    profiler = PhaseProfiler(args.profile, args.profile_dir)
 
     # Load configuration files
-    global main_yaml_data, checksum_yaml_data, download_yaml_data, readme_data, version_diff
-    main_yaml_data = load_yaml_file(PATH_MAIN)
-    checksum_yaml_data = load_yaml_file(PATH_CHECKSUM)
-    download_yaml_data = load_yaml_file(PATH_DOWNLOAD)
-    readme_data = open_readme(PATH_README)
+    with profiler.phase('load'):
+        main_yaml_data = load_yaml_file(PATH_MAIN)
+        checksum_yaml_data = load_yaml_file(PATH_CHECKSUM)
+        download_yaml_data = load_yaml_file(PATH_DOWNLOAD)
+        readme_data = open_readme(PATH_README)
     if not (main_yaml_data and checksum_yaml_data and download_yaml_data and readme_data):
         logging.error(f'Failed to open one or more configuration files, current working directory is {pwd}. Exiting...')
         sys.exit(1)
+    component_stats = load_component_stats(PATH_COMPONENT_STATS)
 
     # CI - create version_diff file
     if args.ci_check:
@@ -482,55 +986,131 @@ def main():
             logging.error(f'Failed to create {PATH_VERSION_DIFF} file')
             sys.exit(1)
 
-    # Process single component
+    # Components to process, kubernetes versioned components only with --series
     if args.component != 'all':
-        if args.component in COMPONENT_INFO:
-            specific_component_info = {args.component: COMPONENT_INFO[args.component]}
-            # Get repository metadata => releases, tags and commits
-            logging.info(f'Fetching repository metadata for the component {args.component}')
-            repo_metadata = get_repository_metadata(specific_component_info, session)
-            if not repo_metadata:
-                sys.exit(1)
-            process_component(args.component, COMPONENT_INFO[args.component], repo_metadata, session)
-        else:
+        if args.component not in COMPONENT_INFO:
             logging.error(f'Component {args.component} not found in config.')
             sys.exit(1)
-    # Process all components in the configuration file concurrently
+        component_info = {args.component: COMPONENT_INFO[args.component]}
+    elif args.series:
+        component_info = {component: COMPONENT_INFO[component] for component in KUBE_SERIES_COMPONENTS}
     else:
-        # Get repository metadata => releases, tags and commits
-        logging.info('Fetching repository metadata for all components')
-        repo_metadata = get_repository_metadata(COMPONENT_INFO, session)
-        if not repo_metadata:
+        component_info = COMPONENT_INFO
+
+    try:
+        if args.watch:
+            watch(component_info, session)
+        elif not run_pipeline(component_info, session):
             sys.exit(1)
-        with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
-            futures = []
-            logging.info(f'Running with {executor._max_workers} executors')
-            for component, component_data in COMPONENT_INFO.items():
-                futures.append(executor.submit(process_component, component, component_data, repo_metadata, session))
-            for future in futures:
-                future.result()
-
-    # CI - save JSON file
+    finally:
+        # Save Chrome trace-event file, failed runs included
+        if args.trace_out:
+            safe_save_files(args.trace_out, save_func=tracer.save)
+    
+    logging.info('Finished.')
+
+def run_pipeline(component_info, session):
+    # Get repository metadata => releases and tags, once for all series
+    logging.info(f'Fetching repository metadata for {", ".join(component_info)}')
+    with profiler.phase('metadata'):
+        repo_metadata = get_repository_metadata(component_info, session)
+    if not repo_metadata:
+        return False
+    invalidate_version_indexes(component_info)
+    for component in component_info:
+        component_bytes.pop(component, None)
+        if args.ci_check:
+            version_diff.pop(component, None)
+
+    # Process components concurrently, each requested series is a separate job of the shared executor
+    series_list = args.series or [None]
+    with profiler.phase('components'), ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+        futures = {}
+        logging.info(f'Running with {executor._max_workers} executors')
+        # Submit the slowest components first to reduce total wall time
+        for component in schedule_components(component_info, repo_metadata):
+            for series in series_list:
+                futures[(component, series)] = executor.submit(run_component, component, component_info[component], repo_metadata, session, series)
+        # Merge order => configuration order, oldest series first so the newest versions end up on top
+        component_updates = {(component, series): futures[(component, series)].result() for component in component_info for series in series_list}
+
+    # CI - fetch release description and commits of the latest versions, then save JSON file
     if args.ci_check:
-        safe_save_files(PATH_VERSION_DIFF, version_diff, save_json_file)
+        outdated_components = {component: version_diff[component] for component in component_info if component in version_diff}
+        logging.info(f'Fetching version details for {len(outdated_components)} components with a discrepancy')
+        with profiler.phase('details'):
+            version_details = get_version_details(outdated_components, session)
+        if version_details is None:
+            return False
+        for component, details in version_details.items():
+            version_diff[component].update(extract_version_details(details))
+        with profiler.phase('save'):
+            safe_save_files(PATH_VERSION_DIFF, version_diff, save_json_file)
         
-    # Save configurations
+    # Merge checksums and versions in configuration order, then save configurations
     else:
-        safe_save_files(PATH_CHECKSUM, checksum_yaml_data, save_yaml_file)
-        safe_save_files(PATH_DOWNLOAD, download_yaml_data, save_yaml_file)
-        safe_save_files(PATH_README, readme_data, save_readme)
-    
-    logging.info('Finished.')
+        with profiler.phase('merge'):
+            for component_update in component_updates.values():
+                if component_update:
+                    merge_component_update(component_update)
+        with profiler.phase('save'):
+            safe_save_files(PATH_CHECKSUM, checksum_yaml_data, save_yaml_file)
+            safe_save_files(PATH_CHECKSUM_INDEX, checksum_yaml_data, save_checksum_index)
+            safe_save_files(PATH_DOWNLOAD, download_yaml_data, save_yaml_file)
+            safe_save_files(PATH_README, readme_data, save_readme)
+            safe_save_files(PATH_COMPONENT_STATS, component_stats, save_json_file)
+    return True
+
+def watch(component_info, session):
+    # Parsed files, session, version indexes and caches stay in memory between polls,
+    # the pipeline only runs for components whose repository moved upstream
+    upstream_state = {}
+    logging.info(f'Watching upstream every {args.watch_interval}s')
+    try:
+        while True:
+            # One trace per pass, the file holds the latest pass
+            tracer.reset()
+            try:
+                changed_components, new_state = detect_upstream_changes(component_info, upstream_state, session)
+                if changed_components is None:
+                    logging.warning('Failed to poll upstream, retrying on next interval')
+                elif changed_components:
+                    logging.info(f'Upstream changed for {", ".join(changed_components)}')
+                    if run_pipeline({component: component_info[component] for component in changed_components}, session):
+                        upstream_state = new_state
+                else:
+                    logging.info('No upstream change')
+                    upstream_state = new_state
+            except (Exception, SystemExit) as e: # keep the daemon alive, upstream state is unchanged so the pass is retried
+                logging.error(f'Watch pass failed, retrying on next interval: {e!r}')
+            finally:
+                if args.trace_out:
+                    tracer.save(args.trace_out)
+            time.sleep(args.watch_interval)
+    except KeyboardInterrupt:
+        logging.info('Stopped watching')
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Kubespray version and checksum updater for dependencies')
     parser.add_argument('--loglevel', default='INFO', help='Set the log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)')
     parser.add_argument('--component', default='all', help='Specify a component to process, default is all components')
-    parser.add_argument('--max-workers', type=int, default=4, help='Maximum number of concurrent workers, use with caution(sometimes less is more)')
+    parser.add_argument('--max-workers', type=int, default=16, help='Maximum number of concurrent workers, in-flight downloads per host are adjusted automatically below this limit. Components are scheduled longest first from cache/component_stats.json of previous local runs; CI starts without the cache and uses static estimates (default: 16)')
     parser.add_argument('--ci-check', action='store_true', help='Check versions, store discrepancies in version_diff.json')
     parser.add_argument('--graphql-number-of-entries', type=int, default=10, help='Number of releases/tags to retrieve from Github GraphQL per component (default: 10)')
-    parser.add_argument('--graphql-number-of-commits', type=int, default=5, help='Number of commits to retrieve from Github GraphQL per tag (default: 5)')
+    parser.add_argument('--graphql-number-of-commits', type=int, default=5, help='Number of commits to retrieve from Github GraphQL for the latest tag of outdated components (default: 5)')
+    parser.add_argument('--trace-out', help='Write a Chrome trace-event timeline of GraphQL queries, downloads and hashing to this file')
+    parser.add_argument('--profile', choices=['cpu', 'mem'], help='Profile each phase (load, metadata, components, details, merge, save) with cProfile or tracemalloc')
+    parser.add_argument('--profile-dir', default='profile', help='Directory for the per-phase profile reports (default: profile)')
+    parser.add_argument('--watch', action='store_true', help='Keep running, poll upstream release/tag counts and latest release and process only components that changed; files are kept in memory, do not edit them meanwhile')
+    parser.add_argument('--watch-interval', type=int, default=WATCH_INTERVAL_SECONDS, help=f'Seconds between upstream polls with --watch (default: {WATCH_INTERVAL_SECONDS})')
+    parser.add_argument('--series', type=parse_series, help=f'Comma separated kubernetes minors (e.g. 1.28,1.29,1.30) to refresh {", ".join(KUBE_SERIES_COMPONENTS)} checksums for, from a single metadata fetch')
     args = parser.parse_args()
+    if args.series:
+        if args.ci_check:
+            parser.error('--series cannot be used with --ci-check')
+        if args.component != 'all' and args.component not in KUBE_SERIES_COMPONENTS:
+            parser.error(f'--series only applies to {", ".join(KUBE_SERIES_COMPONENTS)}')
+        args.graphql_number_of_entries = max(args.graphql_number_of_entries, GRAPHQL_MAX_ENTRIES)
 
     main()
\ No newline at end of file
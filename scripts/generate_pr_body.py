@@ -1,3 +1,4 @@
+import os
 import sys
 import json
 import argparse
@@ -6,51 +7,17 @@ import argparse
 # Otherwise it will be part of the PR body
 
 
-def load_json(component):
+def load_json(path_version_diff):
     try:
-        with open('version_diff.json', 'r') as f:
-            repo_metadata = json.load(f)
-            component_data = repo_metadata.get(component)
-            return component_data
+        with open(path_version_diff, 'r') as f:
+            return json.load(f)
     except Exception as e:
         return None
 
-def get_version_commits(version, component_metadata):
-    tags = component_metadata.get('refs', {}).get('nodes', [])
-    for tag in tags:
-        if tag['name'] == version:
-            target = tag.get('target', {})
-
-            # Check if the target is a Tag pointing to a Commit
-            if 'history' in target.get('target', {}):
-                commit_history = target['target']['history'].get('edges', [])
-            # Check if the target is directly a Commit object
-            elif 'history' in target:
-                commit_history = target['history'].get('edges', [])
-            else:
-                return None
-
-            commits = []
-            for commit in commit_history:
-                commit_node = commit.get('node', {})
-                commit_info = {
-                    'oid': commit_node.get('oid'),
-                    'message': commit_node.get('message'),
-                    'url': commit_node.get('url')
-                }
-                commits.append(commit_info)
-
-            if commits:
-                return commits
-    return None
-
-def get_version_description(version, repo_metadata):
-    if repo_metadata:
-        releases = repo_metadata.get('releases', {}).get('nodes', [])
-        for release in releases:
-            if release.get('tagName') == version:
-                description = release.get('description', None)
-                return format_description(description)
+def get_version_description(component_data):
+    description = component_data.get('description')
+    if description:
+        return format_description(description)
     return None
 
 def handle_reference(input):
@@ -76,18 +43,13 @@ def format_description(description):
     else:
         return description
 
-def main():
-    component_data = load_json(args.component)
-    if not component_data:
-        print('Failed to load component data')
-        sys.exit(1)
+def generate_pr_body(component_data):
     owner = component_data.get('owner')
     repo = component_data.get('repo')
     latest_version = component_data.get('latest_version')
-    repo_metadata = component_data.get('repo_metadata')
     release_url = f'https://github.com/{owner}/{repo}/releases/tag/{latest_version}'
-    commits = get_version_commits(latest_version, repo_metadata)
-    description = get_version_description(latest_version, repo_metadata)
+    commits = component_data.get('commits')
+    description = get_version_description(component_data)
 
     # General info
     pr_body = f"""
@@ -118,13 +80,53 @@ def main():
         pr_commits += '\n</details>'
         pr_body += pr_commits
 
+    return pr_body
+
+def save_pr_bodies(output_dir, pr_bodies):
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        for component, pr_body in pr_bodies.items():
+            with open(os.path.join(output_dir, f'{component}.md'), 'w') as f:
+                f.write(pr_body)
+        return True
+    except Exception as e:
+        print(f'Failed to save PR bodies to {output_dir}: {e}')
+        return False
+
+def main():
+    version_diff = load_json(args.version_diff)
+    if version_diff is None:
+        print('Failed to load version diff')
+        sys.exit(1)
+
+    # All components => one body per component, loaded and rendered in a single process
+    if args.all:
+        pr_bodies = {component: generate_pr_body(component_data) for component, component_data in version_diff.items()}
+        if args.output_dir:
+            if not save_pr_bodies(args.output_dir, pr_bodies):
+                sys.exit(1)
+        else:
+            print(json.dumps(pr_bodies, indent=2))
+        return
+
+    component_data = version_diff.get(args.component)
+    if not component_data:
+        print('Failed to load component data')
+        sys.exit(1)
+
     # Print body
-    print(pr_body)
+    print(generate_pr_body(component_data))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Pull Request body generator')
-    parser.add_argument('--component', required=True, help='Specify the component to process')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--component', help='Specify the component to process')
+    target.add_argument('--all', action='store_true', help='Generate the PR body of every component in version_diff.json')
+    parser.add_argument('--output-dir', help='With --all, write <component>.md files to this directory instead of printing JSON')
+    parser.add_argument('--version-diff', default='version_diff.json', help='Path to the version diff file (default: version_diff.json)')
     parser.add_argument('--description-number-of-lines', type=int, default=20, help='Number of lines to include from the description')
     args = parser.parse_args()
+    if args.output_dir and not args.all:
+        parser.error('--output-dir requires --all')
 
     main()